@@ -0,0 +1,179 @@
+import stat
+import sys
+
+import pytest
+
+from uci_chess import UCIEngine
+
+
+FAKE_ENGINE = """\
+import sys
+
+MULTIPV_FIRST = {multipv_first}
+MIXED_DEPTHS = {mixed_depths}
+TRUNCATE_LAST_BLOCK = {truncate_last_block}
+TRAILING_CURRMOVE = {trailing_currmove}
+MOVES = ("e2e4", "d2d4", "g1f3")
+
+
+def print_line(depth, pv):
+    if MULTIPV_FIRST:
+        fields = f"multipv {{pv}} depth {{depth}} seldepth {{depth + 1}}"
+    else:
+        fields = f"depth {{depth}} seldepth {{depth + 1}} multipv {{pv}}"
+    print(f"info {{fields}} score cp {{20 - pv}} nodes 100 time {{depth}} pv {{MOVES[pv - 1]}} e7e5")
+
+
+multipv = 1
+for line in sys.stdin:
+    cmd = line.strip()
+    if cmd == "uci":
+        print("id name Fake")
+        print("option name Hash type spin default 16 min 1 max 33554432")
+        print("option name MultiPV type spin default 1 min 1 max 500")
+        print("uciok")
+    elif cmd == "isready":
+        print("readyok")
+    elif cmd.startswith("setoption name MultiPV value"):
+        multipv = int(cmd.split()[-1])
+    elif cmd.startswith("go"):
+        print("info string NNUE evaluation enabled")
+        for depth in range(1, 4):
+            print(f"info depth {{depth}} currmove e2e4 currmovenumber 1")
+            if MIXED_DEPTHS and depth > 1:
+                # Like Stockfish, reprint the block after each re-searched line.
+                for searched in range(1, multipv + 1):
+                    for pv in range(1, multipv + 1):
+                        print_line(depth if pv <= searched else depth - 1, pv)
+            else:
+                for pv in range(1, multipv + 1):
+                    print_line(depth, pv)
+        if TRUNCATE_LAST_BLOCK:
+            print_line(4, 1)
+        if TRAILING_CURRMOVE:
+            print("info depth 4 currmove d2d4 currmovenumber 2")
+        print("bestmove e2e4 ponder e7e5")
+    elif cmd == "quit":
+        break
+    sys.stdout.flush()
+"""
+
+
+def make_engine(
+    tmp_path,
+    multipv_first=False,
+    mixed_depths=False,
+    truncate_last_block=False,
+    trailing_currmove=False,
+):
+    path = tmp_path / "fake_engine"
+    path.write_text(
+        f"#!{sys.executable}\n"
+        + FAKE_ENGINE.format(
+            multipv_first=multipv_first,
+            mixed_depths=mixed_depths,
+            truncate_last_block=truncate_last_block,
+            trailing_currmove=trailing_currmove,
+        )
+    )
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return UCIEngine(path, timeout=5)
+
+
+def line_summary(output):
+    return [(line["multipv"], line["depth"]) for line in output["lines"]]
+
+
+@pytest.mark.parametrize("multipv_first", [False, True])
+@pytest.mark.parametrize("multi_pv", [1, 3])
+def test_go_yields_one_batch_per_depth(tmp_path, multi_pv, multipv_first):
+    engine = make_engine(tmp_path, multipv_first=multipv_first)
+    engine.set_multi_pv(multi_pv)
+    engine.set_position()
+
+    outputs = list(engine.go(depth=3))
+
+    assert [line_summary(o) for o in outputs] == [
+        [(pv, depth) for pv in range(1, multi_pv + 1)] for depth in (1, 2, 3)
+    ]
+    for output in outputs:
+        assert output["next_move"] == "e2e4"
+        assert output["score"] == {"mate": None, "cp": 19}
+    assert [(o["bestmove"], o["ponder"]) for o in outputs] == [
+        (None, None),
+        (None, None),
+        ("e2e4", "e7e5"),
+    ]
+
+
+@pytest.mark.parametrize("multipv_first", [False, True])
+def test_go_batches_mixed_depth_blocks_by_multipv(tmp_path, multipv_first):
+    engine = make_engine(tmp_path, multipv_first=multipv_first, mixed_depths=True)
+    engine.set_multi_pv(3)
+    engine.set_position()
+
+    outputs = list(engine.go(depth=3))
+
+    assert [[depth for _, depth in line_summary(o)] for o in outputs] == [
+        [1, 1, 1],
+        [2, 1, 1],
+        [2, 2, 1],
+        [2, 2, 2],
+        [3, 2, 2],
+        [3, 3, 2],
+        [3, 3, 3],
+    ]
+    for output in outputs:
+        assert [pv for pv, _ in line_summary(output)] == [1, 2, 3]
+        assert output["next_move"] == "e2e4"
+        assert output["score"] == {"mate": None, "cp": 19}
+    assert [o["bestmove"] for o in outputs] == [None] * 6 + ["e2e4"]
+
+
+def test_go_attaches_bestmove_to_partial_block(tmp_path):
+    engine = make_engine(tmp_path, truncate_last_block=True)
+    engine.set_multi_pv(3)
+    engine.set_position()
+
+    outputs = list(engine.go(depth=4))
+
+    assert line_summary(outputs[-2]) == [(1, 3), (2, 3), (3, 3)]
+    assert outputs[-2]["bestmove"] is None
+    assert line_summary(outputs[-1]) == [(1, 4)]
+    assert outputs[-1]["next_move"] == "e2e4"
+    assert outputs[-1]["bestmove"] == "e2e4"
+
+
+def test_go_yields_bestmove_only_output_after_non_pv_lines(tmp_path):
+    engine = make_engine(tmp_path, trailing_currmove=True)
+    engine.set_multi_pv(3)
+    engine.set_position()
+
+    outputs = list(engine.go(depth=3))
+
+    assert [line_summary(o) for o in outputs[:-1]] == [
+        [(1, depth), (2, depth), (3, depth)] for depth in (1, 2, 3)
+    ]
+    assert all(o["bestmove"] is None for o in outputs[:-1])
+    assert outputs[-1] == {
+        "next_move": None,
+        "score": None,
+        "lines": [],
+        "bestmove": "e2e4",
+        "ponder": "e7e5",
+    }
+
+
+def test_view_raises_timeout_error_without_output(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.engine.timeout = 0.1
+
+    with pytest.raises(TimeoutError):
+        engine.engine.view(index_to_view=0)
+
+
+def test_parse_info_keeps_trailing_key_without_value():
+    parsed = UCIEngine.parse_info(None, "info depth score cp 1 pv e2e4")
+
+    assert parsed["depth"] is None
+    assert parsed["score"] == {"mate": None, "cp": 1}
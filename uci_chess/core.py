@@ -1,19 +1,32 @@
-from threading import Thread
-from queue import Queue
-from subprocess import Popen, PIPE, STDOUT
+from collections import deque
+from threading import Event, Thread
+from subprocess import Popen, PIPE, STDOUT, TimeoutExpired
 from timeit import default_timer as timer
-from time import sleep
 from pathlib import Path
 import logging
+import os
 import re
 
+try:
+    from fcntl import F_SETPIPE_SZ, fcntl
+except ImportError:
+    F_SETPIPE_SZ = None
 
-RE_OPTIONS_LIST = re.compile(r"^option\s+name\s([\w\s]+)\stype\s([\w\s]+?)(\sdefault\s?.*)?$")
 
+RE_OPTIONS_LIST = re.compile(
+    r"^option[ \t]+name[ \t](?P<name>[\w \t]+)[ \t]type[ \t](?P<type>[\w \t]+?)"
+    r"(?P<default>[ \t]default[ \t]?.*)?$",
+    re.MULTILINE | re.ASCII,
+)
+READ_CHUNK_SIZE = 1 << 16
+PIPE_BUFFER_SIZE = 1 << 20
+QUIT_TIMEOUT = 2
+TERMINATE_TIMEOUT = 1
+
+_OPTIONS_CACHE: dict[tuple[Path, int], dict[str, dict]] = {}
 
-class EngineCore:
-    output_buffer = []
 
+class EngineCore:
     def __init__(
         self,
         engine_binary_path: str | Path,
@@ -28,86 +41,131 @@ class EngineCore:
 
         self.engine = Popen(
             self.engine_binary_path,
-            universal_newlines=True,
+            universal_newlines=False,
             stdin=PIPE,
             stdout=PIPE,
             stderr=STDOUT,
         )
-        self._output_queue = Queue()
-        self.buffer_daemon = Thread(target=_read_output_to_queue, args=(self.engine.stdout, self._output_queue))
+        _set_pipe_size(self.engine.stdout.fileno(), PIPE_BUFFER_SIZE)
+        self._stdin_fd = self.engine.stdin.fileno()
+        self._output_deque = deque()
+        self._output_event = Event()
+        self._lookahead = deque()
+        self.buffer_daemon = Thread(target=_read_output, args=(self.engine.stdout.raw, self._output_deque, self._output_event))
         self.buffer_daemon.daemon = True
         self.buffer_daemon.start()
 
+        cache_key = (
+            self.engine_binary_path.resolve(),
+            self.engine_binary_path.stat().st_mtime_ns,
+        )
         self.put("uci")
-        resp = self.get()
-        available_options = []
-        while resp != "uciok":
-            matched = RE_OPTIONS_LIST.match(resp)
-            if matched:
-                available_options.append(
-                    {
-                        "name": matched.group(1).strip() if matched.group(1) else None,
-                        "type": matched.group(2).strip() if matched.group(2) else None,
-                        "default": (
-                            matched.group(3).strip() if matched.group(3) else None
-                        ),
-                    }
-                )
-            resp = self.get()
-
+        handshake = self._read_until("uciok")
+        cached_options = _OPTIONS_CACHE.get(cache_key)
+        if cached_options is None:
+            cached_options = _OPTIONS_CACHE[cache_key] = {
+                m.group("name").strip(): {
+                    "type": m.group("type").strip(),
+                    "default": m.group("default").strip() if m.group("default") else None,
+                }
+                for m in RE_OPTIONS_LIST.finditer(handshake)
+            }
         self.available_options = {
-            ao["name"]: {"type": ao["type"], "default": ao["default"]}
-            for ao in available_options
+            name: dict(option) for name, option in cached_options.items()
         }
 
-    def _move_from_queue_to_buffer(self) -> None:
-        while not self._output_queue.empty():
-            self.output_buffer.append(self._output_queue.get())
-
-    def _wait_output_buffer(self, index_to_view: int | None = None) -> None:
-        start_time = timer()
-        if index_to_view is not None:
-            while len(self.output_buffer) <= index_to_view and timer() - start_time < self.timeout:
-                sleep(0.1)
-                self._move_from_queue_to_buffer()
-        else:
-            while len(self.output_buffer) == 0 and timer() - start_time < self.timeout:
-                sleep(0.1)
-                self._move_from_queue_to_buffer()
+    def _read_until(self, delim: str) -> str:
+        lines = []
+        line = self.get()
+        while line != delim:
+            lines.append(line)
+            line = self.get()
+        return "\n".join(lines)
+
+    def _next_line(self, deadline: float) -> str:
+        output_deque = self._output_deque
+        while not output_deque:
+            remaining = deadline - timer()
+            if remaining <= 0 or not self._output_event.wait(remaining):
+                raise TimeoutError(f"No engine output within {self.timeout} seconds")
+            self._output_event.clear()
+        return output_deque.popleft()
+
+    def _fill_lookahead(self, index_to_view: int) -> None:
+        deadline = timer() + self.timeout
+        while len(self._lookahead) <= index_to_view:
+            self._lookahead.append(self._next_line(deadline))
 
     def put(self, message) -> None:
         logging.debug(message)
-        self.engine.stdin.write(f"{message}\n")
-        self.engine.stdin.flush()
+        data = memoryview(f"{message}\n".encode())
+        while data:
+            data = data[os.write(self._stdin_fd, data):]
 
     def get(self) -> str:
-        self._wait_output_buffer()
-        result = self.output_buffer.pop(0)
+        if self._lookahead:
+            result = self._lookahead.popleft()
+        else:
+            result = self._next_line(timer() + self.timeout)
         logging.debug(f"get response: {result}")
         return result
 
     def view(self, index_to_view: int) -> None:
-        self._wait_output_buffer(index_to_view)
-        result = self.output_buffer[index_to_view]
+        self._fill_lookahead(index_to_view)
+        result = self._lookahead[index_to_view]
         logging.debug(f"view into buffer ({index_to_view}): {result}")
         return result
 
     def is_ready(self) -> bool:
         self.put("isready")
-        resp = self.get()
-        while resp != "readyok":
-            resp = self.get()
+        lookahead = self._lookahead
+        while lookahead:
+            if lookahead.popleft() == "readyok":
+                return True
+        next_line = self._next_line
+        timeout = self.timeout
+        while next_line(timer() + timeout) != "readyok":
+            pass
         return True
 
     def stop(self):
         self.put("stop")
 
     def __del__(self):
-        if self.engine.poll() is None:
-            self.put("quit")
-            self.engine.wait()
-
-
-def _read_output_to_queue(out, output_queue):
-    for line in iter(out.readline, ''):
-        output_queue.put(line.strip())
+        engine = getattr(self, "engine", None)
+        if engine is None:
+            return
+        if engine.poll() is None:
+            try:
+                self.put("quit")
+            except (OSError, ValueError, AttributeError):
+                pass
+            try:
+                engine.wait(timeout=QUIT_TIMEOUT)
+            except TimeoutExpired:
+                engine.terminate()
+                try:
+                    engine.wait(timeout=TERMINATE_TIMEOUT)
+                except TimeoutExpired:
+                    engine.kill()
+                    engine.wait()
+
+
+def _set_pipe_size(fd, size):
+    if F_SETPIPE_SZ is None:
+        return
+    try:
+        fcntl(fd, F_SETPIPE_SZ, size)
+    except OSError as e:
+        logging.debug(f"could not resize pipe buffer: {e}")
+
+
+def _read_output(out, output_deque, output_event, chunk_size=READ_CHUNK_SIZE):
+    pending = b""
+    for chunk in iter(lambda: out.read(chunk_size), b""):
+        *lines, pending = (pending + chunk).split(b"\n")
+        output_deque.extend([line.strip().decode(errors="replace") for line in lines])
+        output_event.set()
+    if pending:
+        output_deque.append(pending.strip().decode(errors="replace"))
+        output_event.set()
@@ -4,12 +4,16 @@ import logging
 from .core import EngineCore
 
 
+RE_PARSE_INFO = re.compile(
+    r"info (?P<pre>.*?)score (?P<kind>cp|mate) (?P<val>-?\d+)(?P<post>.*?) pv (?P<pv>.*)",
+    re.ASCII,
+)
+_INT_KEYS = ("depth", "seldepth", "multipv", "time")
+_PARSE_INFO_MATCH = RE_PARSE_INFO.match
+
+
 class UCIEngine:
-    RE_PARSE_INFO = re.compile(r"info (.*)score ((?:cp|mate) -?\d+)(.*)\s+pv\s+(.*)")
-    RE_BEST_MOVE = re.compile(
-        r"bestmove\s*([abcdefgh12345678]{4})(?:\s*ponder\s*([abcdefgh12345678]{4}))?"
-    )
-    output_buffer = []
+    RE_PARSE_INFO = RE_PARSE_INFO
 
     def __init__(
         self,
@@ -25,6 +29,7 @@ class UCIEngine:
             )
 
         self.engine = EngineCore(engine_binary_path, timeout=timeout)
+        self._available_option_names = frozenset(self.engine.available_options)
         self.default_option_override = options_override
         self.current_multi_pv = 1
         if options_override:
@@ -54,7 +59,7 @@ class UCIEngine:
         self.engine.put(command_str)
 
     def set_option(self, name: str, option: str | None = None) -> None:
-        if name not in self.engine.available_options:
+        if name not in self._available_option_names:
             logging.warning(f'Engine does not support option "{name}"')
         else:
             value_str = f"value {option}" if option else ""
@@ -79,111 +84,97 @@ class UCIEngine:
         raw_output: bool = False,
         **kwargs,
     ):
-        if depth is None:
-            depth_str = "infinite"
-        else:
-            depth_str = f"depth {depth}"
-
-        if wtime is not None:
-            wtime_str = f"wtime {wtime}"
-        else:
-            wtime_str = ""
-
-        if btime is not None:
-            btime_str = f"btime {btime}"
-        else:
-            btime_str = ""
-
-        if winc is not None:
-            winc_str = f"winc {winc}"
-        else:
-            winc_str = ""
-
-        if binc is not None:
-            binc_str = f"binc {binc}"
-        else:
-            binc_str = ""
-
-        if movetime is not None:
-            movetime_str = f"movetime {movetime}"
-        else:
-            movetime_str = ""
-
+        parts = ["go", "infinite" if depth is None else f"depth {depth}"]
+        for param_name, param_val in (
+            ("wtime", wtime),
+            ("btime", btime),
+            ("winc", winc),
+            ("binc", binc),
+            ("movetime", movetime),
+        ):
+            if param_val is not None:
+                parts.append(f"{param_name} {param_val}")
         if searchmoves is not None:
-            searchmoves_str = f"searchmoves {' '.join(searchmoves)}"
-        else:
-            searchmoves_str = ""
-
+            parts.append("searchmoves " + " ".join(searchmoves))
         if nodes is not None:
-            nodes_str = f"nodes {nodes}"
-        else:
-            nodes_str = ""
-
-        param_list = [
-            depth_str,
-            wtime_str,
-            btime_str,
-            winc_str,
-            binc_str,
-            movetime_str,
-            searchmoves_str,
-            nodes_str,
-        ]
+            parts.append(f"nodes {nodes}")
         for param_name, param_val in kwargs.items():
-            param_list.append(f"{param_name} {param_val}")
-        command_str = f"go {' '.join([p for p in param_list if p])}"
+            parts.append(f"{param_name} {param_val}")
+        command_str = " ".join(parts)
         logging.debug(command_str)
         self.engine.put(command_str)
 
+        engine_get = self.engine.get
+        engine_view = self.engine.view
+        parse_info = self.parse_info
+
         if raw_output:
             resp = ""
-            while "bestmove" not in resp:
-                resp = self.engine.get()
+            while not resp.startswith("bestmove"):
+                resp = engine_get()
                 yield resp
         else:
-            continue_flg = True
-            next_resp = None
-            while continue_flg:
-                lines_list = []
-                for i in range(self.current_multi_pv):
-                    resp = self.engine.get()
-                    print(f"resp == prev next_resp: {resp == next_resp}")
-                    tmp_parsed_info = self.parse_info(resp)
-                    while not tmp_parsed_info:
-                        resp = self.engine.get()
-                        tmp_parsed_info = self.parse_info(resp)
-                    lines_list.append(tmp_parsed_info)
-                output = {
-                    "next_move": lines_list[0]["next_move"],
-                    "score": lines_list[0]["score"],
-                    "lines": lines_list,
-                    "bestmove": None,
-                    "ponder": None,
-                }
-                next_resp = self.engine.view(index_to_view=0)
-                if "bestmove" in next_resp:
-                    resp = self.engine.get()
-                    match = self.RE_BEST_MOVE.match(resp)
-                    output["bestmove"] = match.group(1)
-                    output["ponder"] = match.group(2)
-                    continue_flg = False
-                yield output
+            multi_pv = self.current_multi_pv
+            lines_list = []
+            batch_depth = None
+            while True:
+                resp = engine_get()
+                if resp.startswith("bestmove"):
+                    break
+                if not resp.startswith("info ") or " pv " not in resp:
+                    continue
+                tmp_parsed_info = parse_info(resp)
+                if not tmp_parsed_info:
+                    continue
+                line_multi_pv = tmp_parsed_info.get("multipv")
+                line_depth = tmp_parsed_info.get("depth")
+                if line_multi_pv is None:
+                    new_batch = line_depth != batch_depth
+                else:
+                    new_batch = line_multi_pv == 1
+                if new_batch and lines_list:
+                    yield _make_output(lines_list)
+                    lines_list = []
+                batch_depth = line_depth
+                lines_list.append(tmp_parsed_info)
+                if len(lines_list) == multi_pv:
+                    if engine_view(index_to_view=0).startswith("bestmove"):
+                        resp = engine_get()
+                        break
+                    yield _make_output(lines_list)
+                    lines_list = []
+            output = _make_output(lines_list)
+            parts = resp.split()
+            output["bestmove"] = parts[1] if len(parts) > 1 else None
+            output["ponder"] = parts[3] if len(parts) > 3 and parts[2] == "ponder" else None
+            yield output
 
     def parse_info(self, text: str):
-        match = self.RE_PARSE_INFO.match(text)
+        match = _PARSE_INFO_MATCH(text)
         if not match:
             return None
-        score_tmp = match.group(2).split(" ")
-        pv_tmp = match.group(4).split(" ")
-        other_tmp = (match.group(1).strip() + " " + match.group(3).strip()).split(" ")
+        pv_tmp = match.group("pv").split(" ")
         tmp_output = {
             "score": {"mate": None, "cp": None},
             "moves": pv_tmp,
             "next_move": pv_tmp[0],
         }
-        tmp_output["score"][score_tmp[0]] = int(score_tmp[1])
-        for i in range(0, len(other_tmp), 2):
-            tmp_output[other_tmp[i]] = other_tmp[i + 1]
-        for key in ["depth", "seldepth", "multipv", "time"]:
-            tmp_output[key] = int(tmp_output[key])
+        tmp_output["score"][match.group("kind")] = int(match.group("val"))
+        for part in (match.group("pre"), match.group("post")):
+            tokens = iter(part.split())
+            for key in tokens:
+                value = next(tokens, None)
+                if key in _INT_KEYS and value is not None:
+                    value = int(value)
+                tmp_output[key] = value
         return tmp_output
+
+
+def _make_output(lines_list):
+    return {
+        "next_move": lines_list[0]["next_move"] if lines_list else None,
+        "score": lines_list[0]["score"] if lines_list else None,
+        "lines": lines_list,
+        "bestmove": None,
+        "ponder": None,
+    }